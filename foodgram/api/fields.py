@@ -0,0 +1,77 @@
+import binascii
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from drf_extra_fields import fields
+from PIL import Image
+
+BASE64_HEADER = ';base64,'
+# Сколько символов base64 декодируется за один раз.
+BASE64_CHUNK_SIZE = 64 * 1024
+
+
+class Base64ImageField(fields.Base64ImageField):
+    """
+    Поле для загрузки изображения в base64.
+    В отличие от drf_extra_fields.Base64ImageField строка
+    декодируется кусками по BASE64_CHUNK_SIZE прямо во временный
+    файл, без промежуточных копий всей строки и всех байтов.
+    Как и обычные загрузки Django, изображения больше
+    FILE_UPLOAD_MAX_MEMORY_SIZE хранятся на диске, а не в памяти.
+    """
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            return super().to_internal_value(base64_data)
+
+        start = base64_data.find(BASE64_HEADER)
+        start = 0 if start == -1 else start + len(BASE64_HEADER)
+
+        decoded_file = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        try:
+            leftover = ''
+            for offset in range(start, len(base64_data), BASE64_CHUNK_SIZE):
+                # Переносы строк (base64 в формате MIME) сдвигают
+                # границы групп, поэтому пробельные символы удаляются,
+                # а неполная группа переносится в следующий кусок.
+                chunk = leftover + ''.join(
+                    base64_data[offset:offset + BASE64_CHUNK_SIZE].split())
+                end = len(chunk) - len(chunk) % 4
+                decoded_file.write(binascii.a2b_base64(chunk[:end]))
+                leftover = chunk[end:]
+            if leftover:
+                decoded_file.write(binascii.a2b_base64(leftover))
+            decoded_file.seek(0)
+            file_extension = self.get_file_extension(None, decoded_file)
+        except (binascii.Error, ValueError):
+            decoded_file.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        except ValidationError:
+            decoded_file.close()
+            raise
+
+        if file_extension not in self.ALLOWED_TYPES:
+            decoded_file.close()
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        data = File(
+            decoded_file,
+            name=f'{self.get_file_name(None)}.{file_extension}')
+        return super(fields.Base64FieldMixin, self).to_internal_value(data)
+
+    def get_file_extension(self, filename, decoded_file):
+        """
+        Метод определяет формат изображения по заголовку файла
+        средствами Pillow, не читая файл в память целиком.
+        """
+        try:
+            extension = Image.open(decoded_file).format.lower()
+        except (OSError, IOError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        finally:
+            decoded_file.seek(0)
+        return 'jpg' if extension == 'jpeg' else extension
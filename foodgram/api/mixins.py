@@ -1,3 +1,5 @@
+import copy
+
 from rest_framework import mixins, viewsets
 
 
@@ -8,3 +10,19 @@ class CreateDestroyViewSet(mixins.CreateModelMixin,
     Вьюсет определяющий методы POST и DELETE
     """
     pass
+
+
+class CachedFieldsMixin:
+    """
+    Миксин для сериализаторов, набор полей которых не меняется
+    во время работы. Поля строятся один раз на класс, а каждый
+    экземпляр получает их полные копии, так как поля со вложенными
+    полями (child, child_relation) хранят собственное состояние.
+    """
+    _fields_cache = {}
+
+    def get_fields(self):
+        fields = self._fields_cache.get(type(self))
+        if fields is None:
+            fields = self._fields_cache[type(self)] = super().get_fields()
+        return copy.deepcopy(fields)
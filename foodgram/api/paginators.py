@@ -1,5 +1,42 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который не считает COUNT(*) по всей таблице.
+    Для запроса без условий на PostgreSQL число строк берётся
+    из статистики планировщика (pg_class.reltuples), если таблица
+    больше COUNT_ESTIMATE_THRESHOLD строк. В остальных случаях
+    считает точно, но только по id, без тяжёлых аннотаций.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if not queryset.query.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= settings.COUNT_ESTIMATE_THRESHOLD:
+                return row[0]
+        return queryset.values('pk').count()
+
+
 class PageLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class EstimatedCountPagination(PageLimitPagination):
+    """
+    Та же пагинация, что и PageLimitPagination,
+    но с приблизительным count для больших таблиц.
+    """
+    django_paginator_class = EstimatedCountPaginator
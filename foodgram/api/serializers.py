@@ -1,26 +1,51 @@
-from django.shortcuts import get_object_or_404
-from drf_extra_fields.fields import Base64ImageField
+from functools import lru_cache
+
+from django.utils.functional import cached_property
 from rest_framework import serializers
 
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
                             ShoppingCart, Tag)
 from users.models import Subscribe, User
 
+from .fields import Base64ImageField
+from .mixins import CachedFieldsMixin
 from .validators import (validate_cooking_time, validate_ingredients,
                          validate_tags)
 
 
-class RecipeToRepresentationSerializer(serializers.ModelSerializer):
+def get_subscribed_authors(request):
     """
-    Укороченный сериализатор для отображения модели Recipe
-    в некоторых эндпоинтах.
+    Метод возвращает множество id авторов, на которых подписан
+    пользователь. Множество вычисляется одним запросом и кэшируется
+    на объекте запроса, чтобы при сериализации списка не проверять
+    подписку на каждого автора отдельным запросом.
     """
-    class Meta:
-        model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+    if request is None or request.user.is_anonymous:
+        return set()
+    if not hasattr(request, '_subscribed_authors'):
+        request._subscribed_authors = set(
+            Subscribe.objects.filter(user=request.user).values_list(
+                'author_id', flat=True))
+    return request._subscribed_authors
 
 
-class TagSerializer(serializers.ModelSerializer):
+def recipe_short(recipe, request):
+    """
+    Метод возвращает укороченное представление рецепта
+    (id, name, image, cooking_time) для подписок, избранного
+    и списка покупок. Обычная функция вместо ModelSerializer,
+    так как в подписках она вызывается для каждого рецепта
+    каждого автора.
+    """
+    return {
+        'id': recipe.id,
+        'name': recipe.name,
+        'image': (request.build_absolute_uri(recipe.image.url)
+                  if recipe.image else None),
+        'cooking_time': recipe.cooking_time}
+
+
+class TagSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор для использования с моделью Tag.
     """
@@ -34,23 +59,12 @@ class FavoriteRecipeSerializer(serializers.ModelSerializer):
     Сериализатор для работы с моделью Favorite.
     Используется для добавления и удаления рецептов из списка избранного.
     """
-    id = serializers.ReadOnlyField(source='recipe.id')
-    name = serializers.ReadOnlyField(source='recipe.name')
-    image = serializers.CharField(source='recipe.image', read_only=True)
-    cooking_time = serializers.ReadOnlyField(source='recipe.cooking_time')
-
     class Meta:
         model = Favorite
-        fields = ('id', 'name', 'image', 'cooking_time')
-        read_only_fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ()
 
-    def validate(self, data):
-        user = self.context.get('request').user
-        recipe = self.context.get('recipe')
-        if Favorite.objects.filter(recipe_lover=user, recipe=recipe).exists():
-            raise serializers.ValidationError({
-                'errors': 'Рецепт уже в избранном'})
-        return data
+    def to_representation(self, instance):
+        return recipe_short(instance.recipe, self.context.get('request'))
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -63,7 +77,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор для работы с моделью User.
     Используется в качестве вложенного сериализатора
@@ -83,10 +97,15 @@ class UserSerializer(serializers.ModelSerializer):
         или если запрос сделан неавторизованным юзером, True - если
         объект подписки существует.
         """
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return user.follower.filter(author=obj).exists()
+        return obj.id in self.subscribed_authors
+
+    @cached_property
+    def subscribed_authors(self):
+        """
+        Множество авторов текущего пользователя вычисляется один раз
+        на экземпляр сериализатора, а не для каждого объекта списка.
+        """
+        return get_subscribed_authors(self.context.get('request'))
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -122,9 +141,11 @@ class SubscribeSerializer(serializers.ModelSerializer):
         """
         QUERY PARAMETERS: recipes_limit - параметр показывает сколько
         рецептов каждого пользователя нужно показать в ответе.
+        Рецепты берутся из prefetch кэша SubscriptionsViewSet,
+        поэтому срез делается по списку, а не в SQL.
         """
         request = self.context.get('request')
-        recipes = obj.author.recipe.all()
+        recipes = list(obj.author.recipe.all())
         recipes_limit = request.query_params.get('recipes_limit')
         if recipes_limit:
             try:
@@ -132,13 +153,20 @@ class SubscribeSerializer(serializers.ModelSerializer):
             except ValueError:
                 raise serializers.ValidationError({
                     'errors': 'recipes_limit должен быть числом'})
-        return RecipeToRepresentationSerializer(recipes, many=True).data
+        return [recipe_short(recipe, request) for recipe in recipes]
 
     def get_recipes_count(self, obj):
+        """
+        В SubscriptionsViewSet количество аннотируется в queryset,
+        для только что созданной подписки считаем отдельно.
+        """
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.author.recipe.count()
 
 
-class IngredientInRecipeSerializer(serializers.ModelSerializer):
+class IngredientInRecipeSerializer(CachedFieldsMixin,
+                                   serializers.ModelSerializer):
     """
     Сериализатор для работы с моделью IngredientInRecipe.
     Используется для отображения ингредиентов в RecipeSerializer.
@@ -158,7 +186,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор для работы с моделью Recipe.
     """
@@ -178,22 +206,22 @@ class RecipeSerializer(serializers.ModelSerializer):
             'image', 'text', 'cooking_time')
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            recipe=obj, recipe_lover=request.user).exists()
+        """
+        Значение аннотируется в RecipeViewSet.get_queryset.
+        У только что созданного рецепта аннотации нет - он
+        точно еще не в избранном.
+        """
+        return bool(getattr(obj, 'is_favorited', False))
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            recipe=obj, cart_owner=request.user).exists()
+        """
+        Значение аннотируется в RecipeViewSet.get_queryset.
+        """
+        return bool(getattr(obj, 'is_in_shopping_cart', False))
 
     def get_ingredients(self, obj):
-        queryset = IngredientInRecipe.objects.filter(recipe=obj)
-        return IngredientInRecipeSerializer(queryset, many=True).data
+        return IngredientInRecipeSerializer(
+            obj.ingredients.all(), many=True).data
 
     def validate(self, data):
         """
@@ -215,7 +243,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         validate_cooking_time(cooking_time)
         data.update({
             'tags': tags,
-            'ingredients': ingredients,
+            'ingredients': [
+                {'ingredient_id': int(ingredient['id']),
+                 'amount': ingredient['amount']}
+                for ingredient in ingredients],
             'author': self.context.get('request').user
         })
         return data
@@ -230,14 +261,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             cooking_time=self.validated_data.pop('cooking_time'),
             author=self.validated_data.pop('author'))
         new_recipe.tags.add(*tags)
-        bulk_create_data = (
-            IngredientInRecipe(
-                recipe=new_recipe,
-                ingredient=get_object_or_404(
-                    Ingredient, id=ingredient.get('id')),
-                amount=ingredient.get('amount'))
-            for ingredient in ingredients)
-        IngredientInRecipe.objects.bulk_create(bulk_create_data)
+        IngredientInRecipe.bulk_add(new_recipe, ingredients)
         return new_recipe
 
     def update(self, instance, validated_data):
@@ -252,14 +276,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         instance.save()
 
         IngredientInRecipe.objects.filter(recipe=instance).delete()
-        bulk_create_data = (
-            IngredientInRecipe(
-                recipe=instance,
-                ingredient=get_object_or_404(
-                    Ingredient, id=ingredient.get('id')),
-                amount=ingredient.get('amount'))
-            for ingredient in new_ingredients)
-        IngredientInRecipe.objects.bulk_create(bulk_create_data)
+        IngredientInRecipe.bulk_add(instance, new_ingredients)
 
         instance.tags.clear()
         instance.tags.set(new_tags)
@@ -267,6 +284,63 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 
+@lru_cache(maxsize=256)
+def tag_to_dict(tag_id, name, color, slug):
+    """
+    Представление тэга в формате TagSerializer.
+    Тэгов мало и они почти не меняются, поэтому словари
+    кэшируются. Ключ кэша - все поля тэга, так что после
+    изменения тэга просто создается новая запись.
+    """
+    return {'id': tag_id, 'name': name, 'color': color, 'slug': slug}
+
+
+def recipe_to_dict(recipe, request):
+    """
+    Метод собирает представление рецепта для list() и retrieve()
+    без вложенных сериализаторов DRF - на странице списка их
+    создание занимает больше времени, чем сами запросы к базе.
+    Формат ответа совпадает с RecipeSerializer. Ожидает queryset
+    из RecipeViewSet.get_queryset: тэги и ингредиенты берутся из
+    аннотаций tags_json и ingredients_json (PostgreSQL) или из
+    prefetch кэша.
+    """
+    tags = getattr(recipe, 'tags_json', None)
+    if tags is None:
+        tags = [(tag.id, tag.name, tag.color, tag.slug)
+                for tag in recipe.tags.all()]
+    ingredients = getattr(recipe, 'ingredients_json', None)
+    if ingredients is None:
+        ingredients = [
+            (item.ingredient.id, item.ingredient.name,
+             item.ingredient.measurement_unit, item.amount)
+            for item in recipe.ingredients.all()]
+    author = recipe.author
+    return {
+        'id': recipe.id,
+        'tags': [tag_to_dict(*tag) for tag in tags],
+        'author': {
+            'email': author.email,
+            'id': author.id,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'is_subscribed': author.id in get_subscribed_authors(request)},
+        'ingredients': [
+            {'id': ingredient_id, 'name': name,
+             'measurement_unit': measurement_unit, 'amount': amount}
+            for ingredient_id, name, measurement_unit, amount
+            in ingredients],
+        'is_favorited': bool(getattr(recipe, 'is_favorited', False)),
+        'is_in_shopping_cart': bool(
+            getattr(recipe, 'is_in_shopping_cart', False)),
+        'name': recipe.name,
+        'image': (request.build_absolute_uri(recipe.image.url)
+                  if recipe.image else None),
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time}
+
+
 class ShoppingCartSerializer(serializers.ModelSerializer):
     """
     Сериалайзер для добавления и удаления рецепта из списка покупок.
@@ -283,10 +357,6 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         recipe = self.context.get('recipe')
         data['recipe'] = recipe
         data['cart_owner'] = cart_owner
-        if ShoppingCart.objects.filter(cart_owner=cart_owner,
-                                       recipe=recipe).exists():
-            raise serializers.ValidationError({
-                'errors': 'Рецепт уже в списке покупок'})
         return data
 
     def to_representation(self, instance):
@@ -294,8 +364,4 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         Метод принимает на вход объект сериализации
         и возвращает словарь с данными для отображения.
         """
-        requset = self.context.get('request')
-        return RecipeToRepresentationSerializer(
-            instance.recipe,
-            context={'request': requset}
-        ).data
+        return recipe_short(instance.recipe, self.context.get('request'))
@@ -1,30 +1,36 @@
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 
 from api import views
 
 app_name = 'api'
 
-router = DefaultRouter()
+router = SimpleRouter()
 router.register('recipes', views.RecipeViewSet, basename='recipes')
-router.register(
-    r'recipes/(?P<recipe_id>\d+)/favorite',
-    views.FavoriteViewSet, basename='favorite')
 router.register(
     'users/subscriptions',
     views.SubscriptionsViewSet, basename='subscriptions')
 router.register('tags', views.TagViewSet, basename='tags')
 router.register('ingredients', views.IngredientViewSet, basename='ingredients')
-router.register(
-    r'recipes/(?P<recipe_id>\d+)/shopping_cart',
-    views.ShoppingCartViewSet, basename='shopping_cart')
 
+recipe_urls = [
+    path(
+        'favorite/',
+        views.FavoriteViewSet.as_view({'post': 'create', 'delete': 'delete'}),
+        name='favorite'),
+    path(
+        'shopping_cart/',
+        views.ShoppingCartViewSet.as_view(
+            {'post': 'create', 'delete': 'delete'}),
+        name='shopping_cart'),
+]
 
 urlpatterns = [
     path(
         'recipes/download_shopping_cart/',
         views.DownloadShoppingCart.as_view()),
+    path('recipes/<int:recipe_id>/', include(recipe_urls)),
+    path('users/<int:author_id>/subscribe/', views.SubscribeAPIView.as_view()),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
-    path('auth/', include('djoser.urls.authtoken')),
-    path('users/<int:author_id>/subscribe/', views.SubscribeAPIView.as_view())]
+    path('auth/', include('djoser.urls.authtoken'))]
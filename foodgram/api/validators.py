@@ -2,46 +2,59 @@ import re
 
 from django.core.exceptions import ValidationError
 
+INGREDIENT_NAME_RE = re.compile(r'^[\w%,"\'«»&()]+\Z')
+HEX_RE = re.compile(r'^#([A-Fa-f0-9]{3,6})$')
+REAL_NAME_RE = re.compile(r'^[\w-]+\Z')
+
 
 def validate_ingredients(ingredients_list, val_model):
     """
     Метод проверяет существуют ли указанные ингредиенты
     и правильно ли задано их количество.
     Если нет - выбрасывает ValidationError.
+    Наличие всех ингредиентов проверяется одним запросом
+    только по id, сами объекты не загружаются.
     Вместе с ingredients_list передаем модель Ingredient,
     чтобы избежать circular import.
     """
     if len(ingredients_list) < 1:
         raise ValidationError(
             'Блюдо должно содержать хотя бы 1 ингредиент')
-    unique_list = []
+    unique_ids = set()
     for ingredient in ingredients_list:
         if not ingredient.get('id'):
             raise ValidationError('Укажите id ингредиента')
-        ingredient_id = ingredient.get('id')
-        if not val_model.objects.filter(pk=ingredient_id).exists():
-            raise ValidationError(
-                f'{ingredient_id}- ингредиент с таким id не найден')
-        if id in unique_list:
+        ingredient_id = int(ingredient.get('id'))
+        if ingredient_id in unique_ids:
             raise ValidationError(
                 f'{ingredient_id}- дублирующийся ингредиент')
-        unique_list.append(ingredient_id)
+        unique_ids.add(ingredient_id)
         ingredient_amount = ingredient.get('amount')
         if int(ingredient_amount) < 1:
             raise ValidationError(
                 f'Количество {ingredient} должно быть больше 1')
+    missing = unique_ids - set(val_model.objects.filter(
+        id__in=unique_ids).values_list('id', flat=True))
+    if missing:
+        raise ValidationError(
+            f'{", ".join(map(str, sorted(missing)))}'
+            f'- ингредиент с таким id не найден')
 
 
 def validate_tags(tags_list, val_model):
     """
-    Метод проверяет существует ли указанный тег.
+    Метод проверяет существуют ли указанные теги.
     Если нет - выбрасывает ValidationError.
     Вместе с tags_list передаем модель Tag,
     чтобы избежать circular import.
     """
-    for tag in tags_list:
-        if not val_model.objects.filter(pk=tag).exists():
-            raise ValidationError(f'{tag} - Такого тэга не существует')
+    tag_ids = {int(tag) for tag in tags_list}
+    missing = tag_ids - set(val_model.objects.filter(
+        id__in=tag_ids).values_list('id', flat=True))
+    if missing:
+        raise ValidationError(
+            f'{", ".join(map(str, sorted(missing)))}'
+            f' - Такого тэга не существует')
 
 
 def validate_cooking_time(value):
@@ -62,10 +75,8 @@ def validate_ingredient_name(value):
     русские и английские буквы.
     Если нет - выбрасывает ValidationError.
     """
-    reg = r'^[\w%,"\'«»&()]+\Z'
-    listik = value.split()
-    for item in listik:
-        if not re.fullmatch(reg, item):
+    for item in value.split():
+        if not INGREDIENT_NAME_RE.fullmatch(item):
             raise ValidationError({
                 'Недопустимое значение имени {item}'})
 
@@ -76,9 +87,7 @@ def validate_hex(value):
     возможному
     Если нет - выбрасывает ValidationError.
     """
-    regex = "^#([A-Fa-f0-9]{3,6})$"
-    hehex = re.compile(regex)
-    if not re.search(hehex, value):
+    if not HEX_RE.match(value):
         raise ValidationError({
             'Недопустимое значение цвета'})
 
@@ -99,8 +108,6 @@ def validate_real_name(value):
     пользователя заданному регулярному выражению.
     Если нет - выбрасывает ValidationError.
     """
-    reg = r'^[\w-]+\Z'
-
-    if not re.fullmatch(reg, value):
+    if not REAL_NAME_RE.fullmatch(value):
         raise ValidationError({
             'Недопустимое значение имени {value}'})
@@ -1,23 +1,54 @@
-from django.db.models import Sum
-from django.shortcuts import HttpResponse, get_object_or_404
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (BooleanField, Count, Exists, IntegerField,
+                              OuterRef, Prefetch, Subquery, Sum, Value,
+                              prefetch_related_objects)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
                             ShoppingCart, Tag)
+from recipes.signals import get_shopping_cart_version
 from users.models import Subscribe, User
 
 from .filters import IngredientSearchFilter, RecipeFilter
 from .mixins import CreateDestroyViewSet
-from .paginators import PageLimitPagination
+from .paginators import EstimatedCountPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (FavoriteRecipeSerializer, IngredientSerializer,
                           RecipeSerializer, ShoppingCartSerializer,
-                          SubscribeSerializer, TagSerializer)
+                          SubscribeSerializer, TagSerializer, recipe_to_dict)
+
+# Тэги и ингредиенты рецепта в виде массивов значений, которые
+# PostgreSQL собирает прямо в основном запросе списка рецептов.
+# Порядок значений ожидает api.serializers.recipe_to_dict.
+TAGS_JSON_SQL = (
+    'SELECT COALESCE(jsonb_agg(jsonb_build_array('
+    't.id, t.name, t.color, t.slug) ORDER BY t.id), \'[]\') '
+    'FROM recipes_tag t '
+    'JOIN recipes_recipe_tags rt ON rt.tag_id = t.id '
+    'WHERE rt.recipe_id = recipes_recipe.id')
+INGREDIENTS_JSON_SQL = (
+    'SELECT COALESCE(jsonb_agg(jsonb_build_array('
+    'i.id, i.name, i.measurement_unit, ir.amount) ORDER BY ir.id), \'[]\') '
+    'FROM recipes_ingredientinrecipe ir '
+    'JOIN recipes_ingredient i ON i.id = ir.ingredient_id '
+    'WHERE ir.recipe_id = recipes_recipe.id')
+
+# Поля, нужные для укороченного представления рецепта
+# (api.serializers.recipe_short).
+SHORT_RECIPE_FIELDS = ('id', 'name', 'image', 'cooking_time')
+SHOPPING_LIST_CACHE_KEY = 'shopping_list:{}:{}'
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -27,13 +58,63 @@ class RecipeViewSet(viewsets.ModelViewSet):
     изменения или удаления автором его рецепта.
     Доступна фильтрация по избранному, автору, списку покупок и тегам.
     """
-    queryset = Recipe.objects.all()
-    pagination_class = PageLimitPagination
+    pagination_class = EstimatedCountPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        """
+        Автор, тэги и ингредиенты (вместе с самими Ingredient)
+        подгружаются заранее, а is_favorited и is_in_shopping_cart
+        вычисляются в том же запросе, чтобы сериализатор не делал
+        отдельных запросов на каждый рецепт.
+        В PostgreSQL тэги и ингредиенты собираются через jsonb_agg
+        в том же запросе, на других базах - через prefetch_related.
+        """
+        queryset = Recipe.objects.select_related('author')
+        if connection.vendor == 'postgresql':
+            queryset = queryset.annotate(
+                tags_json=RawSQL(
+                    TAGS_JSON_SQL, (), output_field=JSONField()),
+                ingredients_json=RawSQL(
+                    INGREDIENTS_JSON_SQL, (), output_field=JSONField()))
+        else:
+            queryset = queryset.prefetch_related(
+                'tags',
+                Prefetch(
+                    'ingredients',
+                    queryset=IngredientInRecipe.objects.select_related(
+                        'ingredient')))
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(
+                    False, output_field=BooleanField()))
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                recipe=OuterRef('pk'), recipe_lover=user)),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                recipe=OuterRef('pk'), cart_owner=user)))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Для чтения рецепты собираются функцией recipe_to_dict,
+        RecipeSerializer используется только для записи.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(
+                [recipe_to_dict(recipe, request) for recipe in queryset])
+        return self.get_paginated_response(
+            [recipe_to_dict(recipe, request) for recipe in page])
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(recipe_to_dict(self.get_object(), request))
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -59,20 +140,44 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (IngredientSearchFilter,)
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        """
+        Список отдается через values() без создания объектов
+        Ingredient и сериализатора: без поиска это вся таблица
+        ингредиентов. Формат совпадает с IngredientSerializer.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(
+            list(queryset.values(*IngredientSerializer.Meta.fields)))
+
 
 class SubscriptionsViewSet(viewsets.ModelViewSet):
     """
     Вьюесет позволяет посмотреть список подписок.
     Переопределяем queryset так как в сериализаторе используем
-    dotted notation и лучше prefetch_related объекты author.
+    dotted notation: автор подтягивается через select_related,
+    его рецепты - одним prefetch запросом, а их количество
+    считается в основном запросе коррелированным подзапросом.
+    В отличие от Count('author__recipe') подзапрос не требует
+    GROUP BY по всем рецептам и не попадает в COUNT пагинатора.
     """
     serializer_class = SubscribeSerializer
     permission_classes = [IsAuthenticated, ]
-    pagination_class = PageLimitPagination
+    pagination_class = EstimatedCountPagination
 
     def get_queryset(self):
+        recipes_count = Recipe.objects.filter(
+            author=OuterRef('author')).order_by().values(
+                'author').annotate(count=Count('id')).values('count')
         return Subscribe.objects.filter(
-            user=self.request.user).prefetch_related('author')
+            user=self.request.user).select_related('author').annotate(
+                recipes_count=Coalesce(
+                    Subquery(recipes_count, output_field=IntegerField()),
+                    0)).prefetch_related(
+                        Prefetch(
+                            'author__recipe',
+                            queryset=Recipe.objects.only(
+                                *SHORT_RECIPE_FIELDS, 'author')))
 
 
 class SubscribeAPIView(APIView):
@@ -87,27 +192,31 @@ class SubscribeAPIView(APIView):
             return Response(
                 {'errors': 'Вы не можете подписаться на самого себя'},
                 status=status.HTTP_400_BAD_REQUEST)
-        subscription = Subscribe.objects.filter(
-            author=author, user=request.user)
-        if subscription.exists():
+        try:
+            with transaction.atomic():
+                queryset = Subscribe.objects.create(
+                    author=author, user=request.user)
+        except IntegrityError:
             return Response(
                 {'errors': 'Вы уже подписаны на этого автора'},
                 status=status.HTTP_400_BAD_REQUEST)
-        queryset = Subscribe.objects.create(author=author, user=request.user)
+        prefetch_related_objects(
+            [queryset],
+            Prefetch(
+                'author__recipe',
+                queryset=Recipe.objects.only(*SHORT_RECIPE_FIELDS, 'author')))
         serializer = SubscribeSerializer(
             queryset, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, author_id):
-        user = request.user
-        author = get_object_or_404(User, id=author_id)
-        subscription = Subscribe.objects.filter(
-            author=author, user=user)
-        if not subscription.exists():
+        deleted, _ = Subscribe.objects.filter(
+            author_id=author_id, user=request.user).delete()
+        if not deleted:
+            get_object_or_404(User, id=author_id)
             return Response(
                 {'errors': 'Вы еще не подписаны на этого автора'},
                 status=status.HTTP_400_BAD_REQUEST)
-        subscription.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -116,28 +225,23 @@ class FavoriteViewSet(viewsets.ModelViewSet):
     serializer_class = FavoriteRecipeSerializer
     permission_classes = [IsAuthenticated, ]
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context.update({'recipe': self.kwargs.get('recipe_id')})
-        return context
-
     def perform_create(self, serializer):
-        recipe = get_object_or_404(Recipe, pk=self.kwargs.get('recipe_id'))
-        serializer.save(
-            recipe_lover=self.request.user, recipe=recipe)
+        recipe = get_object_or_404(
+            Recipe.objects.only(*SHORT_RECIPE_FIELDS),
+            pk=self.kwargs.get('recipe_id'))
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    recipe_lover=self.request.user, recipe=recipe)
+        except IntegrityError:
+            raise ValidationError({'errors': 'Рецепт уже в избранном'})
 
-    @action(methods=('delete',), detail=True)
     def delete(self, request, recipe_id):
-        recipe = self.kwargs.get('recipe_id')
-        recipe_lover = self.request.user
-        if not Favorite.objects.filter(recipe=recipe,
-                                       recipe_lover=recipe_lover).exists():
+        deleted, _ = Favorite.objects.filter(
+            recipe_id=recipe_id, recipe_lover=request.user).delete()
+        if not deleted:
             return Response({'errors': 'Рецепт не в избранном'},
                             status=status.HTTP_400_BAD_REQUEST)
-        get_object_or_404(
-            Favorite,
-            recipe_lover=recipe_lover,
-            recipe=recipe).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -151,49 +255,62 @@ class ShoppingCartViewSet(CreateDestroyViewSet):
 
     def get_serializer_context(self):
         """
-        Метод передает в сериализатор необходимые ему для создания модели
-        атрибуты cart_owner и recipe.
+        Метод передает в сериализатор рецепт, необходимый
+        для создания модели и для ответа.
         """
         context = super().get_serializer_context()
-        recipe = get_object_or_404(Recipe, pk=self.kwargs.get('recipe_id'))
+        recipe = get_object_or_404(
+            Recipe.objects.only(*SHORT_RECIPE_FIELDS),
+            pk=self.kwargs.get('recipe_id'))
         context.update({'recipe': recipe})
-        context.update({'cart_owner': self.request.user})
         return context
 
-    @action(methods=('delete',), detail=True)
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'errors': 'Рецепт уже в списке покупок'})
+
     def delete(self, request, recipe_id):
-        recipe = self.kwargs.get('recipe_id')
-        cart_owner = self.request.user
-        if not ShoppingCart.objects.filter(recipe=recipe,
-                                           cart_owner=cart_owner).exists():
+        deleted, _ = ShoppingCart.objects.filter(
+            recipe_id=recipe_id, cart_owner=request.user).delete()
+        if not deleted:
             return Response({'errors': 'Рецепт не добавлен в список покупок'},
                             status=status.HTTP_400_BAD_REQUEST)
-        get_object_or_404(
-            ShoppingCart,
-            cart_owner=cart_owner,
-            recipe=recipe).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def shopping_list_lines(ingredients):
+    """Построчно отдаёт текст списка покупок."""
+    yield 'Список покупок:\n\n'
+    for item in ingredients:
+        yield (f'{item["ingredient__name"]}: '
+               f'{item["amount"]} '
+               f'{item["ingredient__measurement_unit"]}\n')
+
+
 class DownloadShoppingCart(APIView):
+    """
+    Скачивание списка покупок. Готовый текст кэшируется на
+    SHOPPING_LIST_CACHE_TIMEOUT секунд под ключом с версией
+    списка покупок пользователя, которая меняется при каждом
+    добавлении или удалении рецепта (recipes.signals).
+    """
     permission_classes = [IsAuthenticated, ]
 
     def get(self, request):
-        if not ShoppingCart.objects.filter(cart_owner=request.user).exists():
-            return Response({'errors': 'В вашем списке покупок ничего нет'},
-                            status=status.HTTP_400_BAD_REQUEST)
-        rec_pk = ShoppingCart.objects.filter(
-            cart_owner=request.user).values('recipe_id')
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe_id__in=rec_pk).values(
-                'ingredient__name', 'ingredient__measurement_unit').annotate(
-                    amount=Sum('amount')).order_by()
-
-        text = 'Список покупок:\n\n'
-        for item in ingredients:
-            text += (f'{item["ingredient__name"]}: '
-                     f'{item["amount"]} '
-                     f'{item["ingredient__measurement_unit"]}\n')
+        cache_key = SHOPPING_LIST_CACHE_KEY.format(
+            request.user.id, get_shopping_cart_version(request.user.id))
+        text = cache.get(cache_key)
+        if text is None:
+            ingredients = IngredientInRecipe.objects.filter(
+                recipe__shopping_cart__cart_owner=request.user).values(
+                    'ingredient__name',
+                    'ingredient__measurement_unit').annotate(
+                        amount=Sum('amount')).order_by('ingredient__name')
+            text = ''.join(shopping_list_lines(ingredients))
+            cache.set(cache_key, text, settings.SHOPPING_LIST_CACHE_TIMEOUT)
 
         response = HttpResponse(text, content_type='text/plain')
         filename = 'shopping_list.txt'
@@ -95,6 +95,25 @@ DATABASES = {
     }
 }
 
+# Cache
+# Кэш должен быть общим для всех воркеров gunicorn, иначе версия
+# списка покупок, измененная в одном процессе, не видна в другом.
+# Без CACHE_LOCATION (адрес memcached) кэширование отключено.
+
+if os.getenv('CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -165,7 +184,10 @@ DJOSER = {
 USER_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
 TAG_MAX_LENGTH = 200
-INGREDIENT_MAX_LENGTH = 900
+INGREDIENT_MAX_LENGTH = 200
+MEASUREMENT_UNIT_MAX_LENGTH = 24
+COUNT_ESTIMATE_THRESHOLD = 100000
+SHOPPING_LIST_CACHE_TIMEOUT = 60
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
@@ -1,10 +1,29 @@
 import csv
+from itertools import islice
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from recipes.models import Ingredient
 
+# Сколько ингредиентов держится в памяти и передается в один
+# bulk_create; размер INSERT под ограничения базы Django выбирает сам.
+BATCH_SIZE = 400
+
+
+def read_ingredients(ing_file):
+    """
+    Генератор построчно читает csv файл и отдает
+    ингредиенты, пропуская повторы.
+    """
+    seen = set()
+    for name, measurement_unit in csv.reader(ing_file, delimiter=','):
+        if (name, measurement_unit) in seen:
+            continue
+        seen.add((name, measurement_unit))
+        yield Ingredient(name=name, measurement_unit=measurement_unit)
+
 
 class Command(BaseCommand):
     help = 'Import data from data/ingredients.csv'
@@ -13,16 +32,14 @@ class Command(BaseCommand):
         try:
             with open(f'{settings.BASE_DIR}/data/ingredients.csv',
                       'r', encoding='utf-8') as ing_file:
-                reader = csv.reader(ing_file, delimiter=',')
-                upload_list = []
-                for row in reader:
-                    name, measurement_unit = row
-                    newby = Ingredient(
-                        name=name,
-                        measurement_unit=measurement_unit)
-                    if newby not in upload_list:
-                        upload_list.append(newby)
-                Ingredient.objects.bulk_create(upload_list)
+                ingredients = read_ingredients(ing_file)
+                with transaction.atomic():
+                    while True:
+                        batch = list(islice(ingredients, BATCH_SIZE))
+                        if not batch:
+                            break
+                        Ingredient.objects.bulk_create(
+                            batch, ignore_conflicts=True)
                 self.stdout.write(
                     self.style.SUCCESS('Ингредиенты загружены успешно'))
 
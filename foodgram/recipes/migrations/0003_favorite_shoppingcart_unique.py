@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-15 07:16
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def delete_duplicates(apps, schema_editor):
+    """
+    Перед созданием ограничений уникальности удаляет повторные
+    записи, оставляя для каждой пары самую раннюю.
+    """
+    for model_name, owner in (('Favorite', 'recipe_lover'),
+                              ('ShoppingCart', 'cart_owner')):
+        model = apps.get_model('recipes', model_name)
+        keep = model.objects.values(owner, 'recipe').annotate(
+            min_id=Min('id')).values_list('min_id', flat=True)
+        model.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppingcart_recipe_related_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('recipe_lover', 'recipe'), name='unique_recipe_lover_recipe'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('cart_owner', 'recipe'), name='unique_cart_owner_recipe'),
+        ),
+    ]
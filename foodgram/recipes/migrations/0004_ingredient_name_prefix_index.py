@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-15 07:20
+
+from django.db import migrations
+
+INDEX_NAME = 'recipes_ingredient_name_upper_like'
+
+
+def create_index(apps, schema_editor):
+    """
+    Поиск ингредиентов по началу названия (^name) PostgreSQL
+    выполняет как UPPER(name::text) LIKE UPPER('...%').
+    Функциональный индекс с text_pattern_ops позволяет выполнять
+    такой поиск по индексу, а не полным просмотром таблицы.
+    Django 2.2 не умеет описывать такие индексы в Meta.indexes.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX {INDEX_NAME} ON recipes_ingredient '
+        f'(UPPER(name::text) text_pattern_ops)')
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_favorite_shoppingcart_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-15 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredientinrecipe',
+            index=models.Index(fields=['recipe', 'ingredient'], name='recipe_ingredient_idx'),
+        ),
+    ]
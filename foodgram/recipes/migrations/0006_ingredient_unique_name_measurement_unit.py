@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-15 07:45
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Перед созданием ограничения уникальности объединяет
+    одинаковые ингредиенты: рецепты переводятся на ингредиент
+    с наименьшим id, остальные копии удаляются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit').annotate(
+            min_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    for item in duplicates:
+        copies = Ingredient.objects.filter(
+            name=item['name'],
+            measurement_unit=item['measurement_unit']).exclude(
+                id=item['min_id'])
+        IngredientInRecipe.objects.filter(ingredient__in=copies).update(
+            ingredient_id=item['min_id'])
+        copies.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_ingredientinrecipe_recipe_ingredient_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_name_measurement_unit'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-15 07:55
+
+import api.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_ingredient_unique_name_measurement_unit'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='measurement_unit',
+            field=models.CharField(max_length=24, verbose_name='Единицы измерения'),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=models.CharField(max_length=200, validators=[api.validators.validate_ingredient_name], verbose_name='Название'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-15 08:05
+
+from django.db import migrations, models
+
+
+def fix_zero_values(apps, schema_editor):
+    """
+    Перед созданием ограничений поднимает нулевые время
+    приготовления и количество ингредиента до минимального
+    допустимого значения 1, чтобы не удалять рецепты.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    Recipe.objects.filter(cooking_time__lt=1).update(cooking_time=1)
+    IngredientInRecipe.objects.filter(amount__lt=1).update(amount=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_shorter_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_zero_values, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='recipe',
+            constraint=models.CheckConstraint(check=models.Q(cooking_time__gte=1), name='cooking_time_gte_1'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingredientinrecipe',
+            constraint=models.CheckConstraint(check=models.Q(amount__gte=1), name='amount_gte_1'),
+        ),
+    ]
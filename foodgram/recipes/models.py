@@ -37,11 +37,15 @@ class Ingredient(models.Model):
         validators=[validate_ingredient_name])
     measurement_unit = models.CharField(
         verbose_name='Единицы измерения',
-        max_length=settings.INGREDIENT_MAX_LENGTH)
+        max_length=settings.MEASUREMENT_UNIT_MAX_LENGTH)
 
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'measurement_unit'],
+                                    name='unique_name_measurement_unit')
+        ]
 
     def __str__(self):
         return self.name
@@ -73,12 +77,18 @@ class Recipe(models.Model):
         auto_now_add=True, verbose_name='Дата публикации')
 
     class Meta:
-        ordering = ['-pub_date', ]
+        ordering = ['-pub_date', '-id']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx')
+        ]
         constraints = [
             models.UniqueConstraint(fields=['author', 'name'],
-                                    name='unique_author_recipename')
+                                    name='unique_author_recipename'),
+            models.CheckConstraint(check=models.Q(cooking_time__gte=1),
+                                   name='cooking_time_gte_1')
         ]
 
     def __str__(self):
@@ -103,9 +113,29 @@ class IngredientInRecipe(models.Model):
     def __str__(self):
         return self.recipe.name
 
+    @classmethod
+    def bulk_add(cls, recipe, items):
+        """
+        Метод добавляет рецепту ингредиенты одним INSERT.
+        items - список словарей с ключами ingredient_id и amount.
+        """
+        return cls.objects.bulk_create(
+            cls(recipe=recipe,
+                ingredient_id=item['ingredient_id'],
+                amount=item['amount'])
+            for item in items)
+
     class Meta:
         verbose_name = 'Ингредиент в рецепте'
         verbose_name_plural = 'Ингредиенты в рецепте'
+        indexes = [
+            models.Index(fields=['recipe', 'ingredient'],
+                         name='recipe_ingredient_idx')
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(amount__gte=1),
+                                   name='amount_gte_1')
+        ]
 
 
 class Favorite(models.Model):
@@ -121,6 +151,10 @@ class Favorite(models.Model):
     class Meta:
         verbose_name = 'Любимый рецепт'
         verbose_name_plural = 'Любимые рецепты'
+        constraints = [
+            models.UniqueConstraint(fields=['recipe_lover', 'recipe'],
+                                    name='unique_recipe_lover_recipe')
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -131,7 +165,7 @@ class ShoppingCart(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE,
         verbose_name='Рецепт',
-        related_name='+')
+        related_name='shopping_cart')
 
     def __str__(self):
         return self.recipe.name
@@ -139,3 +173,7 @@ class ShoppingCart(models.Model):
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(fields=['cart_owner', 'recipe'],
+                                    name='unique_cart_owner_recipe')
+        ]
@@ -0,0 +1,29 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ShoppingCart
+
+SHOPPING_CART_VERSION_KEY = 'shopping_cart_version:{}'
+
+
+def get_shopping_cart_version(user_id):
+    """
+    Метод возвращает текущую версию списка покупок пользователя.
+    Версия входит в ключ кэша скачиваемого списка покупок.
+    """
+    return cache.get_or_set(
+        SHOPPING_CART_VERSION_KEY.format(user_id), uuid4().hex, None)
+
+
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def bump_shopping_cart_version(sender, instance, **kwargs):
+    """
+    При добавлении или удалении рецепта из списка покупок
+    версия меняется, и закэшированный список больше не читается.
+    """
+    cache.set(
+        SHOPPING_CART_VERSION_KEY.format(instance.cart_owner_id),
+        uuid4().hex, None)
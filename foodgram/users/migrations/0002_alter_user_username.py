@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-15 07:21
+
+import api.validators
+import django.contrib.auth.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='username',
+            field=models.CharField(max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator(), api.validators.validate_username], verbose_name='Логин'),
+        ),
+    ]
@@ -7,9 +7,11 @@ from api.validators import validate_real_name, validate_username
 
 
 class User(AbstractUser):
+    username_validator = UnicodeUsernameValidator()
+
     username = models.CharField(
         'Логин', max_length=settings.USER_MAX_LENGTH, unique=True,
-        validators=[UnicodeUsernameValidator, validate_username])
+        validators=[username_validator, validate_username])
     first_name = models.CharField(
         'Имя', max_length=settings.USER_MAX_LENGTH,
         validators=[validate_real_name], blank=False)